@@ -0,0 +1,163 @@
+"""Startup-time benchmark for the API server.
+
+Measures the cumulative import time of ``server`` (via ``python -X importtime``)
+and the time from spawning uvicorn until the first response and until
+``/healthz`` reports ready. Each run is appended as one JSON line to
+``bench_startup.jsonl`` so results can be compared over time.
+
+Usage:
+    python bench_startup.py [--runs 5] [--timeout 60] [--output bench_startup.jsonl]
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+ROOT_DIR = Path(__file__).parent
+
+
+def measure_import_time() -> float:
+    """Return the cumulative import time of ``server`` in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "server":
+            return int(parts[1]) / 1000
+    raise RuntimeError("server not found in -X importtime output")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(timeout: float = 60.0) -> dict:
+    """Spawn uvicorn and time the first response and the first ready /healthz."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/healthz"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "server:create_app", "--factory",
+            "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=ROOT_DIR,
+    )
+    first_response = None
+    ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(
+                    f"uvicorn exited with code {proc.returncode} before becoming ready; see its output above"
+                )
+            try:
+                with urllib.request.urlopen(url, timeout=5) as resp:
+                    status = resp.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                # Not listening yet (URLError/ConnectionError) or a slow response (TimeoutError).
+                time.sleep(0.01)
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            if first_response is None:
+                first_response = elapsed
+            if status == 200:
+                ready = elapsed
+                break
+            time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"first_response_ms": first_response, "ready_ms": ready}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check_settings(parser: argparse.ArgumentParser):
+    """Fail before spawning uvicorn if the server configuration is missing or invalid."""
+    from dotenv import load_dotenv
+
+    load_dotenv(ROOT_DIR / ".env")
+    sys.path.insert(0, str(ROOT_DIR))
+    import server
+
+    try:
+        server.load_settings()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for /healthz to report ready")
+    parser.add_argument("--output", type=Path, default=ROOT_DIR / "bench_startup.jsonl")
+    args = parser.parse_args()
+
+    check_settings(parser)
+
+    import_times = [measure_import_time() for _ in range(args.runs)]
+    startups = []
+    for _ in range(args.runs):
+        startups.append(measure_first_request(args.timeout))
+        if startups[-1]["ready_ms"] is None:
+            print(
+                f"warning: /healthz did not report ready within {args.timeout:.0f}s "
+                "(is the database reachable?); skipping remaining runs",
+                file=sys.stderr,
+            )
+            break
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "import_runs": args.runs,
+        "startup_runs": len(startups),
+        "ready_runs": sum(1 for r in startups if r["ready_ms"] is not None),
+        "import_ms": median(import_times),
+        "first_response_ms": median(s["first_response_ms"] for s in startups),
+        "ready_ms": median(s["ready_ms"] for s in startups),
+    }
+    print(json.dumps(record, indent=2))
+
+    with open(args.output, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,102 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
-import certifi
 import re
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional, Set
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 import uuid
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url, tlsCAFile=certifi.where())
-db = client[os.environ['DB_NAME']]
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
 api_router = APIRouter(prefix="/api")
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-SECRET_KEY = os.environ.get('SECRET_KEY', 'galaxy-ideas-secret-key-change-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 
+# Seconds a readiness probe waits for the database before reporting 503.
+HEALTHZ_TIMEOUT_SECONDS = 2.0
+# Seconds between background prewarm attempts while the database is unreachable.
+PREWARM_RETRY_SECONDS = 2.0
+
+# The bcrypt context is built on first use (or during prewarm) rather than at
+# import time, so spawning a worker is cheap.
+_pwd_context = None
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.environ.get(name, str(default))
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {value!r}") from None
+
+
+def load_settings() -> dict:
+    """Read and validate the database settings from the environment."""
+    missing = [name for name in ('MONGO_URL', 'DB_NAME') if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
+
+    settings = {
+        "mongo_url": os.environ['MONGO_URL'],
+        "db_name": os.environ['DB_NAME'],
+        "max_pool_size": _int_env('MONGO_MAX_POOL_SIZE', 100),
+        "min_pool_size": _int_env('MONGO_MIN_POOL_SIZE', 0),
+        "server_selection_timeout_ms": _int_env('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+    }
+    if settings["max_pool_size"] < 0:
+        raise RuntimeError("MONGO_MAX_POOL_SIZE must not be negative")
+    if settings["min_pool_size"] < 0:
+        raise RuntimeError("MONGO_MIN_POOL_SIZE must not be negative")
+    if settings["server_selection_timeout_ms"] <= 0:
+        raise RuntimeError("MONGO_SERVER_SELECTION_TIMEOUT_MS must be positive")
+    if settings["min_pool_size"] > settings["max_pool_size"]:
+        raise RuntimeError("MONGO_MIN_POOL_SIZE must not exceed MONGO_MAX_POOL_SIZE")
+    return settings
+
+
+def create_client(settings: dict):
+    """Build the Motor client. Raises on an invalid URI or option; does not wait for the server."""
+    import certifi
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(
+        settings["mongo_url"],
+        tlsCAFile=certifi.where(),
+        maxPoolSize=settings["max_pool_size"],
+        minPoolSize=settings["min_pool_size"],
+        serverSelectionTimeoutMS=settings["server_selection_timeout_ms"],
+    )
+
+
+def get_db(request: Request):
+    return request.app.state.db
+
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def get_secret_key() -> str:
+    return os.environ.get('SECRET_KEY', 'galaxy-ideas-secret-key-change-in-production')
+
+
 # Stop words for keyword extraction
 STOP_WORDS = {
     'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
@@ -144,25 +209,25 @@ class PublicProfile(BaseModel):
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db=Depends(get_db)):
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, get_secret_key(), algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
@@ -208,7 +273,7 @@ def get_idea_keywords(idea: dict) -> Set[str]:
 
 
 @api_router.post("/auth/signup", response_model=Token)
-async def signup(user_data: UserSignup):
+async def signup(user_data: UserSignup, db=Depends(get_db)):
     existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 0})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -239,7 +304,7 @@ async def signup(user_data: UserSignup):
 
 
 @api_router.post("/auth/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, db=Depends(get_db)):
     user = await db.users.find_one({"email": user_data.email}, {"_id": 0})
     if not user or not verify_password(user_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -267,7 +332,7 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 
 
 @api_router.post("/ideas", response_model=Idea)
-async def create_idea(idea_data: IdeaCreate, current_user: dict = Depends(get_current_user)):
+async def create_idea(idea_data: IdeaCreate, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     idea_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
 
@@ -306,7 +371,7 @@ async def create_idea(idea_data: IdeaCreate, current_user: dict = Depends(get_cu
 
 
 @api_router.get("/ideas", response_model=List[Idea])
-async def get_ideas(current_user: dict = Depends(get_current_user)):
+async def get_ideas(current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     ideas = await db.ideas.find({"user_id": current_user["id"]}, {"_id": 0}).to_list(1000)
 
     return [
@@ -326,7 +391,7 @@ async def get_ideas(current_user: dict = Depends(get_current_user)):
 
 
 @api_router.get("/ideas/{idea_id}", response_model=Idea)
-async def get_idea(idea_id: str, current_user: dict = Depends(get_current_user)):
+async def get_idea(idea_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     idea = await db.ideas.find_one({"id": idea_id, "user_id": current_user["id"]}, {"_id": 0})
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
@@ -345,7 +410,7 @@ async def get_idea(idea_id: str, current_user: dict = Depends(get_current_user))
 
 
 @api_router.put("/ideas/{idea_id}", response_model=Idea)
-async def update_idea(idea_id: str, idea_data: IdeaUpdate, current_user: dict = Depends(get_current_user)):
+async def update_idea(idea_id: str, idea_data: IdeaUpdate, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     idea = await db.ideas.find_one({"id": idea_id, "user_id": current_user["id"]}, {"_id": 0})
     if not idea:
         raise HTTPException(status_code=404, detail="Idea not found")
@@ -386,7 +451,7 @@ async def update_idea(idea_id: str, idea_data: IdeaUpdate, current_user: dict =
 
 
 @api_router.delete("/ideas/{idea_id}")
-async def delete_idea(idea_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_idea(idea_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     result = await db.ideas.delete_one({"id": idea_id, "user_id": current_user["id"]})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Idea not found")
@@ -400,7 +465,7 @@ async def delete_idea(idea_id: str, current_user: dict = Depends(get_current_use
 
 
 @api_router.get("/ideas/{idea_id}/related", response_model=List[RelatedIdea])
-async def get_related_ideas(idea_id: str, current_user: dict = Depends(get_current_user)):
+async def get_related_ideas(idea_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     """Find similar ideas from other users using keyword matching."""
     # Get the source idea
     source_idea = await db.ideas.find_one({"id": idea_id, "user_id": current_user["id"]}, {"_id": 0})
@@ -449,7 +514,7 @@ async def get_related_ideas(idea_id: str, current_user: dict = Depends(get_curre
 
 
 @api_router.get("/discover", response_model=List[RelatedIdea])
-async def discover_ideas(current_user: dict = Depends(get_current_user)):
+async def discover_ideas(current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     """Discover ideas from other users based on all your ideas."""
     # Get user's ideas
     user_ideas = await db.ideas.find({"user_id": current_user["id"]}, {"_id": 0}).to_list(100)
@@ -526,7 +591,7 @@ async def discover_ideas(current_user: dict = Depends(get_current_user)):
 
 
 @api_router.post("/constellations", response_model=Constellation)
-async def create_constellation(constellation_data: ConstellationCreate, current_user: dict = Depends(get_current_user)):
+async def create_constellation(constellation_data: ConstellationCreate, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     idea1 = await db.ideas.find_one({"id": constellation_data.idea_id_1, "user_id": current_user["id"]}, {"_id": 0})
     idea2 = await db.ideas.find_one({"id": constellation_data.idea_id_2, "user_id": current_user["id"]}, {"_id": 0})
 
@@ -567,7 +632,7 @@ async def create_constellation(constellation_data: ConstellationCreate, current_
 
 
 @api_router.get("/constellations", response_model=List[Constellation])
-async def get_constellations(current_user: dict = Depends(get_current_user)):
+async def get_constellations(current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     constellations = await db.constellations.find({"user_id": current_user["id"]}, {"_id": 0}).to_list(1000)
 
     return [
@@ -583,7 +648,7 @@ async def get_constellations(current_user: dict = Depends(get_current_user)):
 
 
 @api_router.delete("/constellations/{constellation_id}")
-async def delete_constellation(constellation_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_constellation(constellation_id: str, current_user: dict = Depends(get_current_user), db=Depends(get_db)):
     result = await db.constellations.delete_one({"id": constellation_id, "user_id": current_user["id"]})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Constellation not found")
@@ -592,7 +657,7 @@ async def delete_constellation(constellation_id: str, current_user: dict = Depen
 
 
 @api_router.get("/public/profile/{user_id}", response_model=PublicProfile)
-async def get_public_profile(user_id: str):
+async def get_public_profile(user_id: str, db=Depends(get_db)):
     user = await db.users.find_one({"id": user_id}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -633,23 +698,89 @@ async def get_public_profile(user_id: str):
     )
 
 
-app.include_router(api_router)
+async def prewarm(db):
+    """Open a database connection and load the bcrypt backend before serving."""
+    get_pwd_context().handler("bcrypt").get_backend()
+    await db.command("ping")
+
+
+async def prewarm_until_ready(app: FastAPI):
+    """Retry prewarm in the background until the database answers."""
+    from pymongo.errors import ConnectionFailure
+
+    while True:
+        try:
+            await prewarm(app.state.db)
+        except ConnectionFailure as e:
+            logger.warning("Database unreachable, retrying prewarm in %.1fs: %s", PREWARM_RETRY_SECONDS, e)
+            await asyncio.sleep(PREWARM_RETRY_SECONDS)
+        except Exception:
+            logger.exception("Prewarm failed; /healthz will keep reporting 503")
+            app.state.prewarm_failed = True
+            return
+        else:
+            app.state.ready = True
+            logger.info("Prewarm complete; ready to serve")
+            return
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    # Built before serving so a bad URI or option aborts startup.
+    client = create_client(settings)
+    app.state.client = client
+    app.state.db = client[settings["db_name"]]
+    app.state.ready = False
+    app.state.prewarm_failed = False
+    app.state.prewarm_task = asyncio.create_task(prewarm_until_ready(app))
+    try:
+        yield
+    finally:
+        app.state.prewarm_task.cancel()
+        try:
+            await app.state.prewarm_task
+        except asyncio.CancelledError:
+            pass
+        client.close()
+
+
+async def healthz(request: Request):
+    """Readiness probe: 200 once prewarm has completed and the database answers a ping."""
+    state = request.app.state
+    if state.prewarm_failed:
+        return JSONResponse(status_code=503, content={"status": "failed"})
+    if not state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        await asyncio.wait_for(state.db.command("ping"), timeout=HEALTHZ_TIMEOUT_SECONDS)
+    except Exception:
+        return JSONResponse(status_code=503, content={"status": "unavailable"})
+    return {"status": "ok"}
+
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app() -> FastAPI:
+    from dotenv import load_dotenv
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+    load_dotenv(ROOT_DIR / '.env')
+    settings = load_settings()
 
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.include_router(api_router)
+    app.add_api_route("/healthz", healthz, methods=["GET"])
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+    return app
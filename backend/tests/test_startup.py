@@ -0,0 +1,183 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import motor.motor_asyncio
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import InvalidURI, OperationFailure, ServerSelectionTimeoutError
+
+import server
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class FakeDB:
+    def __init__(self):
+        self.reachable = threading.Event()
+        self.hang = False
+        self.error = None
+
+    async def command(self, name):
+        if self.error is not None:
+            raise self.error
+        if self.hang:
+            await asyncio.sleep(10)
+        if not self.reachable.is_set():
+            raise ServerSelectionTimeoutError("database unreachable")
+        return {"ok": 1}
+
+
+class FakeClient:
+    def __init__(self, host, **kwargs):
+        self.host = host
+        self.kwargs = kwargs
+        self.db = FakeDB()
+        self.closed = False
+
+    def __getitem__(self, name):
+        return self.db
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost:27017")
+    monkeypatch.setenv("DB_NAME", "galaxy_ideas_test")
+    for name in ("MONGO_MAX_POOL_SIZE", "MONGO_MIN_POOL_SIZE", "MONGO_SERVER_SELECTION_TIMEOUT_MS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def clients(env, monkeypatch):
+    created = []
+
+    def make_client(host, **kwargs):
+        client = FakeClient(host, **kwargs)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", make_client)
+    monkeypatch.setattr(server, "PREWARM_RETRY_SECONDS", 0.01)
+    return created
+
+
+def wait_for_status(client, expected, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/healthz")
+        if response.status_code == expected or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+def test_import_defers_heavy_dependencies():
+    code = (
+        "import sys, server\n"
+        "heavy = ['motor', 'pymongo', 'passlib', 'dotenv']\n"
+        "print(','.join(m for m in heavy if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_healthz_reports_ready_after_prewarm(clients):
+    with TestClient(server.create_app()) as client:
+        db = clients[0].db
+        assert client.get("/healthz").status_code == 503
+
+        db.reachable.set()
+        response = wait_for_status(client, 200)
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    assert clients[0].closed
+
+
+def test_shutdown_cancels_pending_prewarm(clients):
+    app = server.create_app()
+    with TestClient(app) as client:
+        assert client.get("/healthz").json() == {"status": "starting"}
+
+    assert app.state.prewarm_task.cancelled()
+    assert clients[0].closed
+
+
+def test_prewarm_stops_retrying_on_non_connection_error(clients, monkeypatch):
+    def make_failing_client(host, **kwargs):
+        client = FakeClient(host, **kwargs)
+        client.db.error = OperationFailure("Authentication failed.")
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", make_failing_client)
+    app = server.create_app()
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 2.0
+        while not app.state.prewarm_task.done() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        response = client.get("/healthz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed"}
+
+
+def test_healthz_times_out_slow_ping(clients, monkeypatch):
+    monkeypatch.setattr(server, "HEALTHZ_TIMEOUT_SECONDS", 0.05)
+
+    with TestClient(server.create_app()) as client:
+        db = clients[0].db
+        db.reachable.set()
+        assert wait_for_status(client, 200).status_code == 200
+
+        db.hang = True
+        response = client.get("/healthz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "unavailable"}
+
+
+def test_pool_settings_reach_client(clients, monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "25")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "1500")
+
+    with TestClient(server.create_app()):
+        pass
+
+    assert clients[0].host == "mongodb://localhost:27017"
+    assert clients[0].kwargs["maxPoolSize"] == 25
+    assert clients[0].kwargs["minPoolSize"] == 5
+    assert clients[0].kwargs["serverSelectionTimeoutMS"] == 1500
+
+
+def test_invalid_uri_aborts_startup(env, monkeypatch):
+    monkeypatch.setenv("MONGO_URL", "http://x")
+    app = server.create_app()
+    with pytest.raises(InvalidURI):
+        with TestClient(app):
+            pass
+
+
+@pytest.mark.parametrize("name, value", [
+    ("MONGO_MAX_POOL_SIZE", "lots"),
+    ("MONGO_MAX_POOL_SIZE", "-1"),
+    ("MONGO_MIN_POOL_SIZE", "-1"),
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "0"),
+])
+def test_create_app_rejects_invalid_settings(env, monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(RuntimeError, match=name):
+        server.create_app()
+
+
+def test_create_app_requires_mongo_url(env, monkeypatch):
+    monkeypatch.delenv("MONGO_URL")
+    with pytest.raises(RuntimeError, match="MONGO_URL"):
+        server.create_app()